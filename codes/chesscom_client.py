@@ -0,0 +1,216 @@
+import hashlib
+import math
+import os
+import tempfile
+import time
+import requests
+from urllib3.util.retry import Retry
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# orjson parses the archive payloads several times faster; the stdlib json
+# module keeps the script working where it is not installed.
+try:
+    import orjson
+    json_loads, json_dumps = orjson.loads, orjson.dumps
+except ImportError:
+    import json
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+HEADERS = {"User-Agent": "ChessRatingRefresh/1.0"}
+ARCHIVES_URL = "https://api.chess.com/pub/player/{user}/games/archives"
+RULES = "chess"
+# (connect, read) seconds: a dead host fails fast, a slow archive still loads
+REQUEST_TIMEOUT = (3.05, 10)
+FETCH_WORKERS = 8
+# Archives requested ahead of the one being scanned. The window starts small
+# and grows to the number of months the games seen so far suggest are still
+# needed, so an active player's run stops after a month or two.
+FETCH_START = 2
+FETCH_AHEAD = FETCH_WORKERS
+
+# Archive responses are kept between runs and revalidated with
+# If-None-Match / If-Modified-Since, so unchanged months come back as 304.
+CACHE_DIR = ".cache/archives"
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+# Bump when the layout of a cache entry changes; older entries are ignored
+# and refetched instead of being misread.
+CACHE_SCHEMA = 3
+
+# chess.com files games by UTC month, but its archives are served from a
+# cache that can lag and late games near midnight may still be filed. A
+# month's copy is used without asking the API only once it was fetched at
+# least this long after the month ended, or was last modified after it.
+FINAL_GRACE = 24 * 3600
+
+# Used by fetch_ratings; worker threads start on first submit.
+FETCH_POOL = ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+# One keep-alive connection per fetch worker. Transient failures are retried
+# once straight away, then back off 0.6s, 1.2s, 2.4s and 4.8s. Once the
+# retries run out the last response is returned rather than raised, so
+# get_json skips that month like any other non-200.
+SESSION.mount("https://", requests.adapters.HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=FETCH_WORKERS,
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False
+    )
+))
+
+# ============================================================
+# HTTP + CACHE
+# ============================================================
+
+def cache_path(url):
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+def month_end(month):
+    year, month = month
+    return datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc).timestamp()
+
+def is_complete(entry, month):
+    end = month_end(month)
+    if entry["fetched"] >= end + FINAL_GRACE:
+        return True
+    try:
+        return parsedate_to_datetime(entry["last_modified"]).timestamp() > end
+    except (TypeError, ValueError):
+        return False
+
+def get_json(url, month=None):
+    # month is the (year, month) an archive covers, if any
+    path = cache_path(url)
+    cached = None
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            cached = json_loads(f.read())
+        if cached.get("schema") != CACHE_SCHEMA:
+            cached = None
+        elif month and is_complete(cached, month):
+            return cached["body"]
+
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    # Taken before the request, so a slow response never looks newer
+    fetched = time.time()
+    r = SESSION.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    if r.status_code == 304 and cached:
+        # Re-stored only once the revalidated copy counts as complete, so it
+        # is trusted from the next run on
+        entry = dict(cached, fetched=fetched)
+        if not (month and is_complete(entry, month)):
+            return cached["body"]
+    elif r.status_code != 200:
+        return None
+    else:
+        entry = {
+            "schema": CACHE_SCHEMA,
+            "fetched": fetched,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "body": json_loads(r.content),
+        }
+    # Fetch threads and overlapping runs never share a temp file
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(json_dumps(entry))
+    os.replace(tmp, path)
+    return entry["body"]
+
+# ============================================================
+# ARCHIVES
+# ============================================================
+
+def get_archives(username):
+    data = get_json(ARCHIVES_URL.format(user=username))
+    return data.get("archives", []) if data else []
+
+def archive_month(archive):
+    year, month = archive.rsplit("/", 2)[-2:]
+    return int(year), int(month)
+
+def get_archive_games(archive):
+    data = get_json(archive, month=archive_month(archive))
+    return data.get("games", []) if data else None
+
+def months_ahead(ratings, scanned):
+    # Months still needed, judged from each unfilled class's games per month
+    need = 1
+    for bucket in ratings.values():
+        missing = bucket.maxlen - len(bucket)
+        if not missing:
+            continue
+        if not bucket:
+            return FETCH_AHEAD
+        need = max(need, math.ceil(missing * scanned / len(bucket)))
+    return min(need, FETCH_AHEAD)
+
+def fetch_ratings(username, classes):
+    # classes maps time_class -> number of most recent games wanted.
+    # One pass over the archives fills every class; each deque is filled newest
+    # first from the left, so it ends up in chronological order.
+    username_lc = username.lower()
+    ratings = {tc: deque(maxlen=n) for tc, n in classes.items()}
+    unfilled = sum(1 for b in ratings.values() if b.maxlen)
+    # Drain archives newest first (chess.com lists them oldest first), with a
+    # window of requests in flight behind the one being scanned.
+    archives = reversed(get_archives(username))
+    pending = deque()
+
+    def top_up(n):
+        for a in islice(archives, max(0, n - len(pending))):
+            pending.append(FETCH_POOL.submit(get_archive_games, a))
+
+    top_up(FETCH_START)
+    scanned = 0
+    try:
+        while pending and unfilled:
+            data = pending.popleft().result()
+            scanned += 1
+
+            for g in reversed(data or ()):
+                bucket = ratings.get(g.get("time_class"))
+                if bucket is None or len(bucket) == bucket.maxlen or g.get("rules") != RULES:
+                    continue
+                white = g["white"]
+                if white["username"].lower() == username_lc:
+                    bucket.appendleft(white["rating"])
+                else:
+                    bucket.appendleft(g["black"]["rating"])
+
+                # Stop mid-month as soon as the last bucket fills up
+                if len(bucket) == bucket.maxlen:
+                    unfilled -= 1
+                    if not unfilled:
+                        break
+
+            if unfilled:
+                top_up(months_ahead(ratings, scanned))
+    finally:
+        for future in pending:
+            future.cancel()
+
+    return {tc: list(b) for tc, b in ratings.items()}
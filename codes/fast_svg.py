@@ -0,0 +1,196 @@
+import math
+
+import numpy as np
+from xml.sax.saxutils import escape
+
+from matplotlib.font_manager import FontProperties
+from matplotlib.textpath import TextToPath
+from matplotlib.ticker import MaxNLocator
+
+# ============================================================
+# CONSTANTS
+# ============================================================
+
+FONT_FAMILY = "'DejaVu Sans', 'Bitstream Vera Sans', Verdana, Arial, Helvetica, sans-serif"
+
+# matplotlib's AutoLocator: nbins from the axis length, "nice" steps
+X_TICK_STEPS = [1, 2, 2.5, 5, 10]
+X_TICK_MAX_BINS = 9
+
+TEXT_TO_PATH = TextToPath()
+TEXT_WIDTHS = {}
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def text_width(text, size):
+    key = (text, size)
+    if key not in TEXT_WIDTHS:
+        w, _, _ = TEXT_TO_PATH.get_text_width_height_descent(
+            text, FontProperties(size=size), ismath=False
+        )
+        TEXT_WIDTHS[key] = w
+    return TEXT_WIDTHS[key]
+
+def fmt(v):
+    return f"{v:.2f}".rstrip("0").rstrip(".")
+
+def dot_path(xs, ys):
+    # Dot centers snapped to 0.1pt and written as relative moves; the deltas are
+    # taken between the rounded positions, so they never drift.
+    tx = np.rint(xs * 10).astype(np.int64)
+    ty = np.rint(ys * 10).astype(np.int64)
+    dx = np.diff(tx).tolist()
+    dy = np.diff(ty).tolist()
+    parts = [f"M{tx[0] / 10:g} {ty[0] / 10:g}h0"]
+    parts.extend(f"m{a / 10:g} {b / 10:g}h0" for a, b in zip(dx, dy))
+    return "".join(parts)
+
+def text_el(x, y, text, size, color, opacity=1.0, anchor="start", baseline="central"):
+    # font-family is inherited from the <svg> root; "start" is the SVG default
+    attrs = f'x="{fmt(x)}" y="{fmt(y)}" font-size="{fmt(size)}" fill="{color}"'
+    if opacity != 1.0:
+        attrs += f' fill-opacity="{fmt(opacity)}"'
+    if anchor != "start":
+        attrs += f' text-anchor="{anchor}"'
+    return f'<text {attrs} dominant-baseline="{baseline}">{escape(text)}</text>'
+
+def line_el(x0, x1, y, color, width, opacity):
+    return (
+        f'<line x1="{fmt(x0)}" y1="{fmt(y)}" x2="{fmt(x1)}" y2="{fmt(y)}" '
+        f'stroke="{color}" stroke-width="{fmt(width)}" stroke-opacity="{fmt(opacity)}"/>'
+    )
+
+def x_ticks(xlim, axis_width, font_size):
+    # AutoLocator picks nbins from how many labels fit on the axis
+    nbins = max(2, min(X_TICK_MAX_BINS, int(axis_width // (font_size * 3))))
+    ticks = MaxNLocator(nbins=nbins, steps=X_TICK_STEPS).tick_values(*xlim)
+    return [t for t in ticks if xlim[0] <= t <= xlim[1]]
+
+# ============================================================
+# HEADER
+# ============================================================
+
+def inline_elements(start_x, y, elements, style, align="left"):
+    step = 1 if align == "left" else -1
+    if step < 0:
+        elements = elements[::-1]
+
+    width = style["size"][0]
+    gap = style["dot_gap"] * width
+    anchor = "start" if align == "left" else "end"
+
+    out = []
+    cursor = start_x
+    for text, color, opacity in elements:
+        if text == "DOT":
+            out.append(text_el(
+                cursor + step * gap / 2, y, "·",
+                style["dot_font_size"], style["text_color"], style["dot_opacity"]
+            ))
+            cursor += step * gap
+        else:
+            out.append(text_el(
+                cursor, y, text,
+                style["text_font_size"], color, opacity, anchor=anchor
+            ))
+            cursor += step * text_width(text, style["text_font_size"])
+    return out
+
+# ============================================================
+# RENDER
+# ============================================================
+
+def svg_open(style):
+    width, height = style["size"]
+    return [
+        '<?xml version="1.0" encoding="utf-8" standalone="no"?>',
+        f'<svg xmlns="http://www.w3.org/2000/svg" '
+        f'width="{fmt(width)}pt" height="{fmt(height)}pt" '
+        f'viewBox="0 0 {fmt(width)} {fmt(height)}" version="1.1" '
+        f'font-family="{FONT_FAMILY}">',
+        f'<rect width="100%" height="100%" fill="{style["bg_color"]}"/>',
+    ]
+
+def svg_close(out):
+    out.append('</svg>')
+    return ("\n".join(out) + "\n").encode("utf-8")
+
+def render_message(text, style):
+    # Centered in the axes box, like ax.text(0.5, 0.5, ...) with the axis off
+    width, height = style["size"]
+    left, bottom, right, top = style["axes"]
+    out = svg_open(style)
+    out.append(text_el(
+        (left + right) / 2 * width, (1 - (bottom + top) / 2) * height, text,
+        style["message_font_size"], style["text_color"], anchor="middle"
+    ))
+    return svg_close(out)
+
+def render_dot_chart(grid, color, header_left, header_right, style):
+    width, height = style["size"]
+    left, bottom, right, top = style["axes"]
+
+    # Axes box in SVG user units (pt, y pointing down)
+    ax_x0, ax_x1 = left * width, right * width
+    ax_y0, ax_y1 = (1 - bottom) * height, (1 - top) * height
+
+    (x_min, x_max), (y_min, y_max) = grid.xlim, grid.ylim
+    sx = (ax_x1 - ax_x0) / (x_max - x_min)
+    sy = (ax_y0 - ax_y1) / (y_max - y_min)
+
+    def px(x):
+        return ax_x0 + (x - x_min) * sx
+
+    def py(y):
+        return ax_y0 - (y - y_min) * sy
+
+    text_color = style["text_color"]
+    tick_size = style["tick_font_size"]
+    radius = math.sqrt(style["dot_area"]) / 2
+
+    out = svg_open(style)
+
+    # Dots: one path of zero-length subpaths; round caps draw each as a
+    # circle with the stroke width as its diameter.
+    out.append(
+        f'<path d="{dot_path(px(grid.xs), py(grid.ys))}" fill="none" stroke="{color}" '
+        f'stroke-opacity="{fmt(style["dot_alpha"])}" stroke-width="{fmt(2 * radius)}" '
+        f'stroke-linecap="round"/>'
+    )
+
+    # Y tick labels, right-aligned against the axes
+    label_x = ax_x0 - style["y_tick_pad"]
+    x_left = ax_x0
+    for tick in grid.yticks:
+        label = str(tick)
+        out.append(text_el(label_x, py(tick), label, tick_size, text_color, anchor="end"))
+        x_left = min(x_left, label_x - text_width(label, tick_size))
+
+    # X ticks and labels below the axis
+    tick_len = style["x_tick_length"]
+    label_y = ax_y0 + tick_len + style["x_tick_pad"]
+    for tick in x_ticks(grid.xlim, ax_x1 - ax_x0, tick_size):
+        x = px(tick)
+        out.append(
+            f'<line x1="{fmt(x)}" y1="{fmt(ax_y0)}" x2="{fmt(x)}" y2="{fmt(ax_y0 + tick_len)}" '
+            f'stroke="{text_color}" stroke-width="{fmt(style["x_tick_width"])}"/>'
+        )
+        out.append(text_el(
+            x, label_y, "%g" % tick, tick_size, text_color,
+            anchor="middle", baseline="hanging"
+        ))
+
+    out.append(line_el(x_left, ax_x1, ax_y0, text_color, style["rule_width"], style["axis_alpha"]))
+
+    # Header row and divider
+    header_y = (1 - style["header_y"]) * height
+    out.extend(inline_elements(x_left, header_y, header_left, style))
+    out.extend(inline_elements(ax_x1, header_y, header_right, style, align="right"))
+    out.append(line_el(
+        x_left, ax_x1, (1 - style["divider_y"]) * height,
+        text_color, style["rule_width"], style["divider_alpha"]
+    ))
+
+    return svg_close(out)
@@ -1,4 +1,3 @@
-import os
 import random
 
 cron_line = '"0 */{prevNo} * * *"'
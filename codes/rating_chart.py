@@ -1,8 +1,3 @@
-from collections import namedtuple
-import datetime
-import math
-import os
-import sys
 import asciichartpy as ac
 import requests
 
@@ -12,9 +7,10 @@ RULES = 'chess'           # chess960 and other variants possible here
 NGAMES = 100              # No. of recent games you want to display...
 headers = {"User-Agent": "ChessRatingRefresh/1.0 aditya.pal.science@gmail.com"}
 ARCHIVES_URL = 'https://api.chess.com/pub/player/{user}/games/archives'
+REQUEST_TIMEOUT = (3.05, 10)   # (connect, read) seconds
 
 def get_archives() -> list:
-    archives_dict = requests.get(url=ARCHIVES_URL.format(user=USERNAME), headers=headers).json()
+    archives_dict = requests.get(url=ARCHIVES_URL.format(user=USERNAME), headers=headers, timeout=REQUEST_TIMEOUT).json()
     # print (archives_dict)
     monthly_archives = archives_dict.get('archives')
     if monthly_archives is None:
@@ -23,7 +19,7 @@ def get_archives() -> list:
 
 
 def get_filtered_games(monthly_archive_url: str) -> list:
-    games_dict = requests.get(url=monthly_archive_url, headers=headers).json()
+    games_dict = requests.get(url=monthly_archive_url, headers=headers, timeout=REQUEST_TIMEOUT).json()
     monthly_games = games_dict.get('games')
     if monthly_games is None:
         return
@@ -1,12 +1,29 @@
+import gzip
+import hashlib
+import io
 import os
-import requests
+import sys
 import numpy as np
+from collections import namedtuple
+from multiprocessing import Pool
 from datetime import datetime
-import pytz
+from zoneinfo import ZoneInfo
+
+# Keep matplotlib's font list under .cache (restored by the workflow) so CI
+# runs skip the system font scan. Must be set before matplotlib is imported.
+os.environ.setdefault("MPLCONFIGDIR", os.path.abspath(".cache/mpl"))
+os.makedirs(os.environ["MPLCONFIGDIR"], exist_ok=True)
 
 import matplotlib
 matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+import matplotlib.style
+from matplotlib.collections import PathCollection
+from matplotlib.lines import Line2D
+from matplotlib.markers import MarkerStyle
+from matplotlib.transforms import IdentityTransform
+
+import chesscom_client
+import fast_svg
 
 # ============================================================
 # FILE SYSTEM
@@ -15,6 +32,20 @@ import matplotlib.pyplot as plt
 OUTPUT_DIR = "assets/svg"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+SVG_METADATA = {"Date": None, "Creator": None, "Format": None, "Type": None}
+
+# GitHub's README renderer does not decode .svgz, so gzip output is opt-in
+# for hosts that serve it with Content-Encoding: gzip.
+COMPRESS_SVG = False
+SVGZ_LEVEL = 6
+
+# Resolution of the rasterized dot layer; text and axes stay vector.
+RASTER_DPI = 200
+
+# Charts are written by fast_svg by default; --legacy renders them through
+# matplotlib instead.
+LEGACY_RENDER = "--legacy" in sys.argv[1:]
+
 # ============================================================
 # GLOBAL VISUAL THEME
 # ============================================================
@@ -22,29 +53,17 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 BG_COLOR = "#F6F4EF"
 TEXT_COLOR = "#1F1F1F"   # charcoal
 
-matplotlib.rcParams.update({
-    "figure.facecolor": BG_COLOR,
-    "axes.facecolor": BG_COLOR,
-    "axes.edgecolor": TEXT_COLOR,
-    "axes.labelcolor": TEXT_COLOR,
-    "xtick.color": TEXT_COLOR,
-    "ytick.color": TEXT_COLOR,
-    "text.color": TEXT_COLOR,
-    "svg.fonttype": "path",
-    "svg.image_inline": False,
-})
+# rcParams live in editorial.mplstyle; keep its colors in sync with these.
+matplotlib.style.use(os.path.join(os.path.dirname(os.path.abspath(__file__)), "editorial.mplstyle"))
 
 # ============================================================
-# USER / API CONFIG
+# USER CONFIG
 # ============================================================
 
+# Fetching, caching and the API session live in chesscom_client.
 USERNAME = "Wawa_wuwa"
-RULES = "chess"
 NGAMES = 100
 
-HEADERS = {"User-Agent": "ChessRatingRefresh/1.0"}
-ARCHIVES_URL = "https://api.chess.com/pub/player/{user}/games/archives"
-
 TIME_CLASSES = {
     "blitz":  {"color": "#3E2F2A"},
     "rapid":  {"color": "#3A5F3A"},
@@ -62,10 +81,26 @@ FLOAT_GAP_RATIO = 0.16
 TOP_PADDING_RATIO = 0.15
 DOT_DIAMETER_Y = 6
 
+DOT_AREA  = 18     # marker area in pt^2, as in scatter(s=...)
+DOT_ALPHA = 0.95
+
+# Tick styling comes from editorial.mplstyle
+TICK_FONT_SIZE = matplotlib.rcParams["xtick.labelsize"]
+X_TICK_LENGTH  = matplotlib.rcParams["xtick.major.size"]
+X_TICK_PAD     = matplotlib.rcParams["xtick.major.pad"]
+Y_TICK_PAD     = matplotlib.rcParams["ytick.major.pad"]
+X_TICK_WIDTH   = matplotlib.rcParams["xtick.major.width"]
+
+# Single marker path shared by every dot; offsets place it per point.
+DOT_MARKER = MarkerStyle("o")
+DOT_PATH = DOT_MARKER.get_path().transformed(DOT_MARKER.get_transform())
+
 # ============================================================
 # LAYOUT MARGINS
 # ============================================================
 
+FIG_SIZE = (11, 4.8)
+
 FIG_LEFT_MARGIN   = 0.075
 FIG_RIGHT_MARGIN  = 0.045
 FIG_BOTTOM_MARGIN = 0.10
@@ -85,56 +120,36 @@ DOT_GAP        = 0.06
 PRIMARY_OPACITY   = 1.0
 SECONDARY_OPACITY = 0.45
 
-# ============================================================
-# DATA FETCHING
-# ============================================================
-
-def get_archives():
-    r = requests.get(ARCHIVES_URL.format(user=USERNAME), headers=HEADERS)
-    return r.json().get("archives", [])[::-1] if r.status_code == 200 else []
+# Divider under the header and the x-axis line drawn below the dots
+RULE_WIDTH    = 1.2
+DIVIDER_ALPHA = 0.8
+AXIS_ALPHA    = 0.4
 
-def get_ratings(time_class):
-    games = []
-    for archive in get_archives():
-        r = requests.get(archive, headers=HEADERS)
-        if r.status_code != 200:
-            continue
+# One wall-clock stamp shared by every chart in this run. Unchanged charts
+# are not redrawn, so the stamp can be days old and carries the date.
+IST = ZoneInfo("Asia/Kolkata")
+TIME_MAIN = datetime.now(IST).strftime("%b %-d, %-I:%M %p").upper()
+TIME_UNIT = " IST"
 
-        data = r.json().get("games", [])
-        filtered = [
-            g for g in data
-            if g.get("time_class") == time_class and g.get("rules") == RULES
-        ][::-1]
-
-        games.extend(filtered)
-        if len(games) >= NGAMES:
-            break
-
-    ratings = []
-    for g in games[:NGAMES]:
-        side = "white" if g["white"]["username"].lower() == USERNAME.lower() else "black"
-        ratings.append(g[side]["rating"])
-
-    return ratings[::-1]
+Y_TEXT = 1 - FIG_TOP_MARGIN + HEADER_Y_OFFSET
+Y_DIV  = 1 - FIG_TOP_MARGIN + DIVIDER_Y_OFFSET
 
 # ============================================================
 # MEASURE TEXT
 # ============================================================
 
+# Widths come straight from the font metrics (cached in fast_svg, shared with
+# the SVG writer), so no Text artist or renderer is involved.
 def measure(fig, text, size):
-    t = fig.text(0, 0, text, fontsize=size)
-    fig.canvas.draw()
-    w = t.get_window_extent(renderer=fig.canvas.get_renderer()).width / fig.bbox.width
-    t.remove()
-    return w
+    return fast_svg.text_width(text, size) * fig.dpi / 72 / fig.bbox.width
 
 # ============================================================
 # VISUAL LEFT EDGE
 # ============================================================
 
-def get_visual_left_edge(fig, ax):
-    fig.canvas.draw()
-    renderer = fig.canvas.get_renderer()
+# get_yticklabels() formats the labels itself, so no full canvas.draw() is
+# needed before asking for their extents.
+def get_visual_left_edge(fig, ax, renderer):
     extents = [t.get_window_extent(renderer) for t in ax.get_yticklabels() if t.get_text()]
     return min(e.x0 for e in extents) / fig.bbox.width if extents else ax.get_position().x0
 
@@ -142,29 +157,35 @@ def get_visual_left_edge(fig, ax):
 # INLINE HEADER RENDERER (FIXED)
 # ============================================================
 
-def draw_inline(fig, start_x, y, elements):
+def draw_inline(fig, start_x, y, elements, align="left"):
+    # Right-aligned clusters are laid out backwards from their anchor, so
+    # they end exactly at start_x without being measured up front.
+    step = 1 if align == "left" else -1
+    if step < 0:
+        elements = elements[::-1]
+
     cursor = start_x
 
     for text, color, opacity in elements:
         if text == "DOT":
-            cursor += DOT_GAP / 2
             fig.text(
-                cursor, y, "·",
+                cursor + step * DOT_GAP / 2, y, "·",
                 fontsize=DOT_FONT_SIZE,
                 color=TEXT_COLOR,
                 alpha=PRIMARY_OPACITY,
                 va="center"
             )
-            cursor += DOT_GAP / 2
+            cursor += step * DOT_GAP
         else:
             fig.text(
                 cursor, y, text,
                 fontsize=TEXT_FONT_SIZE,
                 color=color,
                 alpha=opacity,
+                ha=align,
                 va="center"
             )
-            cursor += measure(fig, text, TEXT_FONT_SIZE)
+            cursor += step * measure(fig, text, TEXT_FONT_SIZE)
 
     return cursor
 
@@ -172,52 +193,41 @@ def draw_inline(fig, start_x, y, elements):
 # HEADER
 # ============================================================
 
-def draw_header(fig, ax, time_class, ratings, color):
-    game_count = len(ratings)
-    latest_elo = ratings[-1]
-
-    ist = pytz.timezone("Asia/Kolkata")
-    time_main = datetime.now(ist).strftime("%-I:%M %p")
-    time_unit = " IST"
-
-    x_left  = get_visual_left_edge(fig, ax)
-    x_right = ax.get_position().x1
-
-    y_text = 1 - FIG_TOP_MARGIN + HEADER_Y_OFFSET
-    y_div  = 1 - FIG_TOP_MARGIN + DIVIDER_Y_OFFSET
-
+def header_elements(time_class, ratings, color):
     left_elements = [
         (time_class.upper(), color, PRIMARY_OPACITY),
         ("DOT", None, None),
         ("CHESS.COM", TEXT_COLOR, SECONDARY_OPACITY),
     ]
 
-    draw_inline(fig, x_left, y_text, left_elements)
-
     right_elements = [
-        (str(game_count), color, PRIMARY_OPACITY),
+        (str(len(ratings)), color, PRIMARY_OPACITY),
         (" GAMES", TEXT_COLOR, SECONDARY_OPACITY),
         ("DOT", None, None),
-        (str(latest_elo), color, PRIMARY_OPACITY),
+        (str(ratings[-1]), color, PRIMARY_OPACITY),
         (" ELO", TEXT_COLOR, SECONDARY_OPACITY),
         ("DOT", None, None),
-        (time_main, color, PRIMARY_OPACITY),
-        (time_unit, TEXT_COLOR, SECONDARY_OPACITY),
+        (TIME_MAIN, color, PRIMARY_OPACITY),
+        (TIME_UNIT, TEXT_COLOR, SECONDARY_OPACITY),
     ]
 
-    total_width = 0
-    for t, _, _ in right_elements:
-        total_width += DOT_GAP if t == "DOT" else measure(fig, t, TEXT_FONT_SIZE)
+    return left_elements, right_elements
 
-    draw_inline(fig, x_right - total_width, y_text, right_elements)
+def draw_header(fig, ax, x_left, time_class, ratings, color):
+    x_right = ax.get_position().x1
+
+    left_elements, right_elements = header_elements(time_class, ratings, color)
+
+    draw_inline(fig, x_left, Y_TEXT, left_elements)
+    draw_inline(fig, x_right, Y_TEXT, right_elements, align="right")
 
     fig.lines.append(
-        plt.Line2D(
-            [x_left, x_right], [y_div, y_div],
+        Line2D(
+            [x_left, x_right], [Y_DIV, Y_DIV],
             transform=fig.transFigure,
             color=TEXT_COLOR,
-            linewidth=1.2,
-            alpha=0.8
+            linewidth=RULE_WIDTH,
+            alpha=DIVIDER_ALPHA
         )
     )
 
@@ -225,18 +235,18 @@ def draw_header(fig, ax, time_class, ratings, color):
 # X-AXIS
 # ============================================================
 
-def draw_x_axis(fig, ax):
-    x_left  = get_visual_left_edge(fig, ax)
-    x_right = ax.get_position().x1
-    y = ax.get_position().y0
+def draw_x_axis(fig, ax, x_left):
+    bbox = ax.get_position()
+    x_right = bbox.x1
+    y = bbox.y0
 
     fig.lines.append(
-        plt.Line2D(
+        Line2D(
             [x_left, x_right], [y, y],
             transform=fig.transFigure,
             color=TEXT_COLOR,
-            linewidth=1.2,
-            alpha=0.4
+            linewidth=RULE_WIDTH,
+            alpha=AXIS_ALPHA
         )
     )
 
@@ -244,9 +254,12 @@ def draw_x_axis(fig, ax):
 # PLOT
 # ============================================================
 
-def plot_dotted_fill(ax, ratings, color):
-    min_rating = min(ratings)
-    max_rating = max(ratings)
+DotGrid = namedtuple("DotGrid", "xs ys xlim ylim yticks")
+
+def dot_grid(ratings):
+    ratings = np.asarray(ratings, dtype=np.int32)
+    min_rating = int(ratings.min())
+    max_rating = int(ratings.max())
     rating_range = max_rating - min_rating
 
     dot_step = max(6, int(rating_range / 22))
@@ -256,46 +269,221 @@ def plot_dotted_fill(ax, ratings, color):
     axis_floor = visual_dot_base - rating_range * FLOAT_GAP_RATIO
     axis_ceiling = max_rating + rating_range * TOP_PADDING_RATIO
 
-    for x, rating in enumerate(ratings):
-        y_vals = range(float_base, rating + dot_step, dot_step)
-        ax.scatter([x]*len(y_vals), y_vals, s=18, color=color, alpha=0.95, linewidths=0)
+    # Column x holds every grid row below ratings[x] + dot_step, i.e.
+    # ceil((ratings[x] - base) / dot_step) + 1 dots; sizing xs/ys from the
+    # counts fills them in one pass, columns left to right.
+    counts = -((float_base - ratings) // dot_step) + 1
+    starts = np.cumsum(counts) - counts
+    xs = np.repeat(np.arange(len(ratings), dtype=np.int32), counts)
+    rows = np.arange(int(counts.sum()), dtype=np.int32) - np.repeat(starts, counts)
+    ys = float_base + rows * dot_step
+
+    # Six evenly spaced labels; on a narrow range several of them round to the
+    # same integer, so duplicates are dropped rather than drawn twice. The
+    # ends are rounded inwards and the labels clamped to the ylim, since a
+    # flat series would otherwise put some above it.
+    lo, hi = np.ceil(axis_floor), np.floor(axis_ceiling)
+    yticks = np.unique(np.clip(np.rint(np.linspace(
+        np.ceil(visual_dot_base + DOT_DIAMETER_Y), hi, 6
+    )), lo, hi))
+
+    return DotGrid(
+        xs=xs,
+        ys=ys,
+        xlim=(-X_AXIS_LEFT_PADDING, len(ratings) + X_AXIS_RIGHT_PADDING),
+        ylim=(axis_floor, axis_ceiling),
+        yticks=yticks.astype(int).tolist(),
+    )
+
+def plot_dotted_fill(ax, ratings, color):
+    grid = dot_grid(ratings)
+
+    dots = PathCollection(
+        [DOT_PATH],
+        sizes=[DOT_AREA],
+        offsets=np.column_stack([grid.xs, grid.ys]),
+        offset_transform=ax.transData,
+        transform=IdentityTransform(),
+        facecolors=color,
+        edgecolors="face",
+        linewidths=0,
+        alpha=DOT_ALPHA
+    )
+    dots.set_rasterized(True)
+    ax.add_collection(dots)
+
+    ax.set_ylim(*grid.ylim)
+    ax.set_xlim(*grid.xlim)
+    ax.set_yticks(grid.yticks)
+
+# ============================================================
+# SAVE
+# ============================================================
+
+def write_svg(path, data):
+    if COMPRESS_SVG:
+        path += "z"
+        data = gzip.compress(data, compresslevel=SVGZ_LEVEL, mtime=0)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def save_svg(fig, path):
+    buf = io.BytesIO()
+    fig.savefig(
+        buf,
+        format="svg",
+        dpi=RASTER_DPI,
+        metadata=SVG_METADATA,
+        bbox_inches=None,
+        pad_inches=0
+    )
+    write_svg(path, buf.getvalue())
+
+# ============================================================
+# FIGURE
+# ============================================================
+
+# One figure per process, cleared and redrawn for each chart it renders.
+FIGURE = None
+
+def get_figure():
+    global FIGURE
+    if FIGURE is None:
+        # pyplot pulls in the whole Figure/Axes stack (~0.2s), which only the
+        # --legacy path needs, so it is imported on first use.
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots(figsize=FIG_SIZE)
+        fig.subplots_adjust(
+            left=FIG_LEFT_MARGIN,
+            right=1 - FIG_RIGHT_MARGIN,
+            bottom=FIG_BOTTOM_MARGIN,
+            top=1 - FIG_TOP_MARGIN
+        )
+        FIGURE = (fig, ax)
+        return FIGURE
 
-    ax.set_ylim(axis_floor, axis_ceiling)
-    ax.set_xlim(-X_AXIS_LEFT_PADDING, len(ratings) + X_AXIS_RIGHT_PADDING)
+    fig, ax = FIGURE
+    ax.clear()
+    fig.lines.clear()
+    fig.texts.clear()
+    return FIGURE
 
-    yticks = np.linspace(visual_dot_base + DOT_DIAMETER_Y, axis_ceiling, 6)
-    ax.set_yticks([int(round(y)) for y in yticks])
+# ============================================================
+# CHANGE DETECTION
+# ============================================================
 
-def style_axes(ax):
-    for s in ["left", "top", "right", "bottom"]:
-        ax.spines[s].set_visible(False)
-    ax.tick_params(axis="y", length=0)
-    ax.tick_params(axis="x", length=4, pad=6)
-    ax.grid(False)
+# A chart is only re-rendered when its key changes. The key covers the
+# ratings and everything that shapes the output, including the renderer
+# sources, but not the header clock: on a run with no new games the SVGs
+# (and their "updated" time) are left as they are.
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+RENDER_SOURCES = ("svg_charts.py", "fast_svg.py", "editorial.mplstyle")
+
+def render_version():
+    h = hashlib.blake2b(digest_size=16)
+    for name in RENDER_SOURCES:
+        with open(os.path.join(CODE_DIR, name), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+RENDER_VERSION = render_version()
+
+def chart_key(item):
+    time_class, cfg, ratings = item
+    payload = [RENDER_VERSION, LEGACY_RENDER, COMPRESS_SVG, time_class, cfg, ratings]
+    return hashlib.blake2b(chesscom_client.json_dumps(payload), digest_size=16).hexdigest()
+
+def hash_path(time_class):
+    return f"{OUTPUT_DIR}/rating-{time_class}.svg.hash"
+
+def chart_unchanged(time_class, key):
+    svg = f"{OUTPUT_DIR}/rating-{time_class}.svg" + ("z" if COMPRESS_SVG else "")
+    if not (os.path.exists(svg) and os.path.exists(hash_path(time_class))):
+        return False
+    with open(hash_path(time_class)) as f:
+        return f.read().strip() == key
+
+def write_hash(time_class, key):
+    tmp = hash_path(time_class) + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(key + "\n")
+    os.replace(tmp, hash_path(time_class))
 
 # ============================================================
 # RENDER
 # ============================================================
 
-for time_class, cfg in TIME_CLASSES.items():
-    ratings = get_ratings(time_class)
+# Layout handed to fast_svg; sizes in points, positions as figure fractions.
+FAST_STYLE = {
+    "size": (FIG_SIZE[0] * 72, FIG_SIZE[1] * 72),
+    "axes": (FIG_LEFT_MARGIN, FIG_BOTTOM_MARGIN, 1 - FIG_RIGHT_MARGIN, 1 - FIG_TOP_MARGIN),
+    "bg_color": BG_COLOR,
+    "text_color": TEXT_COLOR,
+    "dot_area": DOT_AREA,
+    "dot_alpha": DOT_ALPHA,
+    "tick_font_size": TICK_FONT_SIZE,
+    "x_tick_length": X_TICK_LENGTH,
+    "x_tick_pad": X_TICK_PAD,
+    "x_tick_width": X_TICK_WIDTH,
+    "y_tick_pad": Y_TICK_PAD,
+    "header_y": Y_TEXT,
+    "divider_y": Y_DIV,
+    "rule_width": RULE_WIDTH,
+    "divider_alpha": DIVIDER_ALPHA,
+    "axis_alpha": AXIS_ALPHA,
+    "text_font_size": TEXT_FONT_SIZE,
+    "dot_font_size": DOT_FONT_SIZE,
+    "dot_gap": DOT_GAP,
+    "dot_opacity": PRIMARY_OPACITY,
+    "message_font_size": matplotlib.rcParams["font.size"],
+}
 
-    fig, ax = plt.subplots(figsize=(11, 4.8))
-    fig.subplots_adjust(
-        left=FIG_LEFT_MARGIN,
-        right=1 - FIG_RIGHT_MARGIN,
-        bottom=FIG_BOTTOM_MARGIN,
-        top=1 - FIG_TOP_MARGIN
-    )
+def render_class(item):
+    time_class, cfg, ratings = item
+
+    if not LEGACY_RENDER:
+        if ratings:
+            left_elements, right_elements = header_elements(time_class, ratings, cfg["color"])
+            svg = fast_svg.render_dot_chart(
+                dot_grid(ratings), cfg["color"], left_elements, right_elements, FAST_STYLE
+            )
+        else:
+            svg = fast_svg.render_message("NO DATA AVAILABLE", FAST_STYLE)
+        write_svg(f"{OUTPUT_DIR}/rating-{time_class}.svg", svg)
+        return
+
+    fig, ax = get_figure()
 
     if ratings:
         plot_dotted_fill(ax, ratings, cfg["color"])
-        style_axes(ax)
-        draw_header(fig, ax, time_class, ratings, cfg["color"])
-        draw_x_axis(fig, ax)
+        # Header and x-axis share one left edge, measured with one renderer
+        x_left = get_visual_left_edge(fig, ax, fig.canvas.get_renderer())
+        draw_header(fig, ax, x_left, time_class, ratings, cfg["color"])
+        draw_x_axis(fig, ax, x_left)
     else:
         ax.text(0.5, 0.5, "NO DATA AVAILABLE", ha="center", va="center")
         ax.axis("off")
 
-    plt.savefig(f"{OUTPUT_DIR}/rating-{time_class}.svg", format="svg")
-    plt.close()
+    save_svg(fig, f"{OUTPUT_DIR}/rating-{time_class}.svg")
+
+if __name__ == "__main__":
+    # Archives are downloaded once here; the workers only render.
+    ratings = chesscom_client.fetch_ratings(USERNAME, {tc: NGAMES for tc in TIME_CLASSES})
+    items = [(tc, cfg, ratings[tc]) for tc, cfg in TIME_CLASSES.items()]
+    keys = {item[0]: chart_key(item) for item in items}
+    items = [item for item in items if not chart_unchanged(item[0], keys[item[0]])]
+
+    if items:
+        if LEGACY_RENDER and len(items) > 1:
+            # Each worker owns its own figures, so the Agg backend is safe to fork.
+            with Pool(len(items)) as pool:
+                pool.map(render_class, items)
+        else:
+            # fast_svg renders a chart in about a millisecond, well under the
+            # cost of starting worker processes.
+            for item in items:
+                render_class(item)
+
+        # Keys are written only once their charts are safely on disk
+        for time_class, _, _ in items:
+            write_hash(time_class, keys[time_class])